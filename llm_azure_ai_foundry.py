@@ -1,29 +1,71 @@
+import asyncio
+import atexit
+import hashlib
+import json
 import logging
 import os
-from enum import Enum
-from typing import Generator, Iterable, Iterator, List, Optional, Union
+import sys
+import threading
+import time
+import weakref
+from array import array
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache
+from pathlib import Path
+from typing import AsyncGenerator, Generator, Iterable, Iterator, List, Optional, Union
+from urllib.parse import urlparse
 
 import llm
+import openai
 from azure.ai.projects import AIProjectClient
-from azure.ai.projects.models import Deployment
 from azure.identity import (
+    AuthenticationRecord,
     AzureCliCredential,
     ChainedTokenCredential,
     EnvironmentCredential,
     InteractiveBrowserCredential,
+    TokenCachePersistenceOptions,
+    get_bearer_token_provider,
 )
+from azure.identity.aio import AzureCliCredential as AsyncAzureCliCredential
+from azure.identity.aio import ChainedTokenCredential as AsyncChainedTokenCredential
+from azure.identity.aio import EnvironmentCredential as AsyncEnvironmentCredential
+from azure.identity.aio import get_bearer_token_provider as get_async_bearer_token_provider
 from foundry_local import FoundryLocalManager
-from foundry_local.api import FoundryModelInfo
 from foundry_local.service import assert_foundry_installed
 from llm.default_plugins.openai_models import AsyncChat, Chat
 from llm.models import EmbeddingModel
 
+try:
+    import orjson
+except ImportError:  # orjson is optional, fall back to the standard library
+    orjson = None
+
+# Use our own logger rather than configuring the root logger, which belongs to llm
+log = logging.getLogger("llm_azure_ai_foundry")
 if os.environ.get("LLM_AZURE_VERBOSE"):
-    logging.basicConfig(level=logging.INFO)
+    log.setLevel(logging.INFO)
+    log.addHandler(logging.StreamHandler())
+    # Don't print messages twice if the root logger has handlers too
+    log.propagate = False
 else:
-    logging.basicConfig(level=logging.ERROR)
+    log.setLevel(logging.ERROR)
+
+AZURE_DEPLOYMENTS_TTL = int(os.environ.get("AZURE_DEPLOYMENTS_TTL", 1800))
+AZURE_API_VERSION = "2025-04-01-preview"
+COGNITIVE_SCOPE = "https://cognitiveservices.azure.com/.default"
+AZURE_EMBED_CACHE_SIZE = max(0, int(os.environ.get("AZURE_EMBED_CACHE_SIZE", 10000)))
+
+# Deployment lists are cached on disk between invocations, since LLM is
+# a CLI and the in-process cache below is lost when the process exits.
+CACHE_DIR = Path(os.environ.get("XDG_CACHE_HOME", Path.home() / ".cache")) / "llm-azure"
 
-AZURE_MAX_ENDPOINTS = int(os.environ.get("AZURE_MAX_ENDPOINTS", 20))
+# Models which support shorter embeddings get an extra variant for each of these sizes
+EMBEDDING_DIMENSIONS = {
+    "text-embedding-3-small": (512,),
+    "text-embedding-3-large": (256, 1024),
+}
 
 # LLM will call the register_models hook twice for each invocation
 # Since we dynamically register models, cache the answer to avoid
@@ -31,11 +73,23 @@ AZURE_MAX_ENDPOINTS = int(os.environ.get("AZURE_MAX_ENDPOINTS", 20))
 _cached_models = {}
 _cached_embedding_models = {}
 
+# Embeddings are deterministic, so keep the most recent ones (LRU) to avoid repeat requests.
+# Vectors are stored as float32 arrays, a list of Python floats is around 8x the size.
+_cached_embeddings: "OrderedDict[bytes, array]" = OrderedDict()
+
+# Async clients for each event loop, see AsyncClients and close_with_loop()
+_async_clients: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, AsyncClients]" = (
+    weakref.WeakKeyDictionary()
+)
+
+# Project clients are only used for discovery, keep one per endpoint for the process
+_project_clients: dict[str, AIProjectClient] = {}
+
 
 @llm.hookimpl
 def register_models(register):
-    def cached_register(alias, sync_model, async_model=None):
-        _cached_models[alias] = (sync_model, async_model)
+    def cached_register(key, sync_model, async_model=None):
+        _cached_models[key] = (sync_model, async_model)
         register(sync_model, async_model)
 
     if _cached_models:
@@ -50,55 +104,44 @@ def register_models(register):
         FOUNDRY_LOCAL_INSTALLED = False
 
     if FOUNDRY_LOCAL_INSTALLED:
-        mgr = FoundryLocalManager()
-
-        def register_model(model: FoundryModelInfo, status: FoundryModelStatus):
-            if model.task == "chat-completion":
-                cached_register(
-                    model.alias,
-                    FoundryLocalModel(
-                        model_id=model.id, alias=model.alias, manager=mgr, status=status
-                    ),
-                )
-
-        catalog_models = mgr.list_catalog_models()
-        # Group by alias
-        cached_models = mgr.list_cached_models()
-        loaded_models = mgr.list_loaded_models()
-
-        for model in catalog_models:
-            if model not in loaded_models and model not in cached_models:
-                register_model(model, FoundryModelStatus.Available)
-
-        for model in cached_models:
-            if model not in loaded_models:
-                register_model(model, FoundryModelStatus.Cached)
-
-        for model in loaded_models:
-            register_model(model, FoundryModelStatus.Loaded)
+        # The catalog is cached on disk, so the Foundry Local service is only started
+        # here to refresh it. Otherwise it waits until a model's status or client is needed.
+        foundry = FoundryLocal()
+        catalog = load_cache("foundry-local", "catalog")
+        if catalog is None:
+            catalog = foundry.list_chat_models()
+            save_cache("foundry-local", "catalog", catalog)
+
+        for model in catalog:
+            cached_register(
+                model["id"],
+                FoundryLocalModel(model_id=model["id"], alias=model["alias"], foundry=foundry),
+            )
 
-    for suffix, project_client, deployment in get_deployments_from_config("chat_completion"):
+    for suffix, endpoint, deployment in get_deployments_from_config("chat_completion"):
+        # Interned and shared by both models, llm looks models up by this id
+        model_id = sys.intern(f"azure{suffix}/{deployment['name']}")
         cached_register(
-            deployment["name"],
+            model_id,
             AzureAIFoundryModel(
                 deployment_name=deployment["name"],
                 model_name=deployment["modelName"],
-                client=project_client.get_openai_client(api_version="2025-04-01-preview"),
-                suffix=suffix,
+                endpoint=endpoint,
+                model_id=model_id,
             ),
             AsyncAzureAIFoundryModel(
                 deployment_name=deployment["name"],
                 model_name=deployment["modelName"],
-                client=project_client.get_openai_client(api_version="2025-04-01-preview"),
-                suffix=suffix,
+                endpoint=endpoint,
+                model_id=model_id,
             ),
         )
 
 
 @llm.hookimpl
 def register_embedding_models(register):
-    def cached_register(alias, model):
-        _cached_embedding_models[alias] = model
+    def cached_register(key, model):
+        _cached_embedding_models[key] = model
         register(model)
 
     if _cached_embedding_models:
@@ -106,92 +149,342 @@ def register_embedding_models(register):
             register(model)
         return
 
-    for suffix, project_client, deployment in get_deployments_from_config("embeddings"):
-        if deployment["modelName"] == "text-embedding-3-small":
-            cached_register(
-                f"{deployment['name']}-512",
-                AzureAIFoundryEmbeddingModel(
-                    deployment_name=deployment["name"],
-                    model_name=deployment["modelName"],
-                    client=project_client.get_openai_client(api_version="2025-04-01-preview"),
-                    model_id=f"azure{suffix}/{deployment['name']}-512",
-                    dimensions=512,
-                ),
-            )
-        elif deployment["modelName"] == "text-embedding-3-large":
-            cached_register(
-                f"{deployment['name']}-256",
-                AzureAIFoundryEmbeddingModel(
-                    deployment_name=deployment["name"],
-                    model_name=deployment["modelName"],
-                    client=project_client.get_openai_client(api_version="2025-04-01-preview"),
-                    model_id=f"azure{suffix}/{deployment['name']}-256",
-                    dimensions=256,
-                ),
-            )
+    for suffix, endpoint, deployment in get_deployments_from_config("embeddings"):
+        name = deployment["name"]
+        for dimensions in (*EMBEDDING_DIMENSIONS.get(deployment["modelName"], ()), None):
+            alias = f"{name}-{dimensions}" if dimensions else name
+            model_id = sys.intern(f"azure{suffix}/{alias}")
             cached_register(
-                f"{deployment['name']}-1024",
+                model_id,
                 AzureAIFoundryEmbeddingModel(
-                    deployment_name=deployment["name"],
+                    deployment_name=name,
                     model_name=deployment["modelName"],
-                    client=project_client.get_openai_client(api_version="2025-04-01-preview"),
-                    model_id=f"azure{suffix}/{deployment['name']}-1024",
-                    dimensions=1024,
+                    endpoint=endpoint,
+                    model_id=model_id,
+                    dimensions=dimensions,
                 ),
             )
-        cached_register(
-            deployment["name"],
-            AzureAIFoundryEmbeddingModel(
-                deployment_name=deployment["name"],
-                model_name=deployment["modelName"],
-                client=project_client.get_openai_client(api_version="2025-04-01-preview"),
-                model_id=f"azure{suffix}/" + deployment["name"],
-            ),
-        )
 
 
 def get_deployments_from_config(
     required_capability: str,
-) -> Generator[tuple[str, AIProjectClient, Deployment], None, None]:
-    base_endpoint = llm.get_key("azure.endpoint", env="AZURE_ENDPOINT")
+) -> Generator[tuple[str, str, dict], None, None]:
+    # Stored keys take precedence over the environment, as with llm.get_key()
+    all_keys = llm.load_keys()
+    base_endpoint = all_keys.get("azure.endpoint") or os.environ.get("AZURE_ENDPOINT")
     if not base_endpoint:
         return
 
+    # Extra endpoints, azure.endpoint.N keys or AZURE_ENDPOINT_N variables (which win)
+    extra_endpoints = {}
+    for prefix, source in (("azure.endpoint.", all_keys), ("AZURE_ENDPOINT_", os.environ)):
+        for key, endpoint in source.items():
+            if not key.startswith(prefix):
+                continue
+            index = key[len(prefix) :]
+            # Plain ASCII numbers only, isdigit() alone allows "²" and "01" would clash with "1"
+            if not (index.isascii() and index.isdigit() and str(int(index)) == index):
+                continue
+            if endpoint.strip():
+                extra_endpoints[int(index)] = endpoint
+
     endpoints = [("", base_endpoint)]
+    endpoints.extend((f".{i}", extra_endpoints[i]) for i in sorted(extra_endpoints))
+
+    # The same project can be configured under more than one suffix, only list it once
+    deployments = {endpoint: load_cache("deployments", endpoint) for _, endpoint in endpoints}
+    missing = [endpoint for endpoint, cached in deployments.items() if cached is None]
+    if missing:
+        # Listing is IO bound, so query the uncached endpoints concurrently
+        with ThreadPoolExecutor(max_workers=min(16, len(missing))) as executor:
+            listed = executor.map(list_deployments, missing)
+            for endpoint, endpoint_deployments in zip(missing, listed):
+                deployments[endpoint] = endpoint_deployments
+                save_cache("deployments", endpoint, endpoint_deployments)
+
+    for suffix, endpoint in endpoints:
+        for deployment in deployments[endpoint] or []:
+            if deployment["capabilities"].get(required_capability):
+                yield suffix, endpoint, deployment
+
+
+@lru_cache(maxsize=None)
+def get_credential() -> ChainedTokenCredential:
+    return ChainedTokenCredential(
+        EnvironmentCredential(), AzureCliCredential(), get_interactive_credential()
+    )
+
+
+@lru_cache(maxsize=None)
+def get_interactive_credential() -> "LazyInteractiveBrowserCredential":
+    # Shared by the sync and async credential chains, so there is only one browser login
+    return LazyInteractiveBrowserCredential()
+
+
+class LazyInteractiveBrowserCredential:
+    """
+    InteractiveBrowserCredential, only constructed if the rest of the chain fails.
+
+    The token cache and authentication record are persisted, so after the first
+    browser login later invocations acquire tokens silently.
+    """
+
+    def __init__(self):
+        self._credential = None
+        self._lock = threading.Lock()
+
+    def get_token(self, *scopes, **kwargs):
+        # Endpoints are listed concurrently, only prompt for a login once
+        with self._lock:
+            if self._credential is None:
+                self._credential = self._create_credential(scopes)
+            credential = self._credential
+        return credential.get_token(*scopes, **kwargs)
+
+    def _create_credential(self, scopes) -> InteractiveBrowserCredential:
+        record_path = CACHE_DIR / "authentication-record.json"
+        try:
+            record = AuthenticationRecord.deserialize(record_path.read_text())
+        except (OSError, ValueError, KeyError, TypeError):
+            # Missing or unreadable, log in again and replace it
+            record = None
+        credential = InteractiveBrowserCredential(
+            cache_persistence_options=TokenCachePersistenceOptions(
+                name="llm-azure", allow_unencrypted_storage=True
+            ),
+            authentication_record=record,
+        )
+        if record is None:
+            record = credential.authenticate(scopes=list(scopes))
+            try:
+                write_atomic(record_path, record.serialize().encode("utf-8"))
+            except OSError as e:
+                log.warning(f"Could not write authentication record {record_path}: {e}")
+        return credential
+
+    def close(self):
+        if self._credential is not None:
+            self._credential.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
+
+def list_deployments(endpoint: str) -> list[dict]:
+    log.info(f"Checking Azure AI Foundry endpoint: {endpoint}")
+    return [
+        {
+            "name": deployment["name"],
+            "modelName": deployment["modelName"],
+            "capabilities": dict(deployment["capabilities"]),
+        }
+        for deployment in get_project_client(endpoint).deployments.list()
+    ]
 
-    # Extra endpoints
-    for i in range(AZURE_MAX_ENDPOINTS):
-        # all keys
-        all_keys = llm.load_keys()
-        if os.environ.get(f"AZURE_ENDPOINT_{i}"):
-            endpoints.append((f".{i}", os.environ[f"AZURE_ENDPOINT_{i}"]))
-        elif f"azure.endpoint.{i}" in all_keys and all_keys[f"azure.endpoint.{i}"].strip():
-            endpoints.append((f".{i}", all_keys[f"azure.endpoint.{i}"]))
-
-    credential_chain = ChainedTokenCredential(
-        EnvironmentCredential(), AzureCliCredential(), InteractiveBrowserCredential()
+
+def get_project_client(endpoint: str) -> AIProjectClient:
+    project_client = _project_clients.get(endpoint)
+    if project_client is None:
+        project_client = _project_clients.setdefault(
+            endpoint, AIProjectClient(endpoint=endpoint, credential=get_credential())
+        )
+    return project_client
+
+
+@atexit.register
+def close_project_clients():
+    for project_client in _project_clients.values():
+        project_client.close()
+    _project_clients.clear()
+
+
+@lru_cache(maxsize=None)
+def get_http_client() -> openai.DefaultHttpxClient:
+    # One connection pool for every endpoint, so connections are reused between models
+    http_client = openai.DefaultHttpxClient()
+    atexit.register(http_client.close)
+    return http_client
+
+
+def openai_client_kwargs(endpoint: str) -> dict:
+    """
+    The settings AIProjectClient.get_openai_client() would use, that method can't share
+    an HTTP client or create an async client.
+    """
+    return {
+        # Inference is served from the host of the project endpoint
+        "azure_endpoint": f"https://{urlparse(endpoint).netloc}",
+        "api_version": AZURE_API_VERSION,
+    }
+
+
+@lru_cache(maxsize=None)
+def get_openai_client(endpoint: str) -> openai.AzureOpenAI:
+    # One client per endpoint, shared by the sync and embedding models
+    return openai.AzureOpenAI(
+        **openai_client_kwargs(endpoint),
+        azure_ad_token_provider=get_bearer_token_provider(get_credential(), COGNITIVE_SCOPE),
+        http_client=get_http_client(),
     )
 
-    with credential_chain as credential:
-        for suffix, endpoint in endpoints:
-            logging.info(f"Checking Azure AI Foundry endpoint: {endpoint}")
-            with AIProjectClient(endpoint=endpoint, credential=credential) as project_client:
-                for deployment in project_client.deployments.list():
-                    if (
-                        required_capability in deployment["capabilities"]
-                        and deployment["capabilities"][required_capability]
-                    ):
-                        yield suffix, project_client, deployment
+
+class AsyncClients:
+    """
+    Async credential, connection pool and OpenAI clients for one event loop.
+
+    These are bound to the loop that created them, so they can't be shared for the
+    life of the process like the sync clients.
+    """
+
+    def __init__(self):
+        self.credential = AsyncChainedTokenCredential(
+            AsyncEnvironmentCredential(),
+            AsyncAzureCliCredential(),
+            AsyncLazyInteractiveBrowserCredential(),
+        )
+        self.token_provider = get_async_bearer_token_provider(self.credential, COGNITIVE_SCOPE)
+        self.http_client = openai.DefaultAsyncHttpxClient()
+        self.openai_clients: dict[str, openai.AsyncAzureOpenAI] = {}
+        self.closer: Optional[AsyncGenerator] = None
+
+    def get_openai_client(self, endpoint: str) -> openai.AsyncAzureOpenAI:
+        client = self.openai_clients.get(endpoint)
+        if client is None:
+            client = self.openai_clients[endpoint] = openai.AsyncAzureOpenAI(
+                **openai_client_kwargs(endpoint),
+                azure_ad_token_provider=self.token_provider,
+                http_client=self.http_client,
+            )
+        return client
+
+    async def close(self):
+        await self.http_client.aclose()
+        await self.credential.close()
+
+
+class AsyncLazyInteractiveBrowserCredential:
+    """
+    There is no async InteractiveBrowserCredential, so run the shared sync one in a
+    thread rather than blocking the event loop.
+    """
+
+    async def get_token(self, *scopes, **kwargs):
+        return await asyncio.to_thread(get_interactive_credential().get_token, *scopes, **kwargs)
+
+    async def close(self):
+        pass
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, exc_type=None, exc_value=None, traceback=None):
+        pass
+
+
+def get_async_openai_client(endpoint: str) -> openai.AsyncAzureOpenAI:
+    loop = asyncio.get_running_loop()
+    clients = _async_clients.get(loop)
+    if clients is None:
+        clients = _async_clients[loop] = AsyncClients()
+        # Run the closer up to its yield, which registers it with the loop's async
+        # generator hooks, so asyncio.run() finalizes it before closing the loop
+        closer = close_with_loop(loop, clients)
+        try:
+            closer.asend(None).send(None)
+        except StopIteration:
+            pass
+        # The loop only holds a weak reference to it
+        clients.closer = closer
+    return clients.get_openai_client(endpoint)
+
+
+async def close_with_loop(loop: asyncio.AbstractEventLoop, clients: AsyncClients):
+    """
+    Close a loop's clients when it shuts down its async generators.
+
+    Pooled connections refer back to the loop, so the clients would otherwise keep
+    it alive, and they can't be closed once the loop itself has been closed.
+    """
+    try:
+        yield
+    finally:
+        _async_clients.pop(loop, None)
+        await clients.close()
+
+
+@atexit.register
+def close_async_clients():
+    # For loops which are still open, e.g. run with run_until_complete() rather than
+    # asyncio.run(). A loop closed without shutdown_asyncgens() can't be cleaned up.
+    for loop, clients in list(_async_clients.items()):
+        if not loop.is_closed() and not loop.is_running():
+            loop.run_until_complete(clients.close())
+    _async_clients.clear()
+
+
+def json_loads(data: bytes):
+    if orjson is not None:
+        return orjson.loads(data)
+    return json.loads(data)
+
+
+def json_dumps(obj) -> bytes:
+    if orjson is not None:
+        return orjson.dumps(obj)
+    return json.dumps(obj).encode("utf-8")
+
+
+def cache_path(name: str, key: str) -> Path:
+    digest = hashlib.sha256(key.encode("utf-8")).hexdigest()[:16]
+    return CACHE_DIR / f"{name}-{digest}.json"
+
+
+def load_cache(name: str, key: str) -> Optional[list[dict]]:
+    path = cache_path(name, key)
+    try:
+        if time.time() - path.stat().st_mtime > AZURE_DEPLOYMENTS_TTL:
+            return None
+        cached = json_loads(path.read_bytes())
+    except (OSError, ValueError):
+        return None
+    # Anything unexpected, including a hash collision, is a miss rather than an error
+    if not isinstance(cached, dict) or cached.get("key") != key:
+        return None
+    items = cached.get("items")
+    if not isinstance(items, list):
+        return None
+    log.info(f"Using cached {name} for {key}")
+    return items
+
+
+def save_cache(name: str, key: str, items: list[dict]):
+    path = cache_path(name, key)
+    try:
+        write_atomic(path, json_dumps({"key": key, "items": items}))
+    except OSError as e:
+        log.warning(f"Could not write cache {path}: {e}")
+
+
+def write_atomic(path: Path, data: bytes):
+    # Write to a temporary file and rename it, so concurrent readers never see a partial file
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = path.with_suffix(f".{os.getpid()}.tmp")
+    tmp_path.write_bytes(data)
+    os.replace(tmp_path, path)
 
 
 class AzureAIFoundryModel(Chat):
     needs_key = None
 
-    def __init__(self, deployment_name: str, model_name: str, client, suffix: str = ""):
-        self._client = client
+    def __init__(self, deployment_name: str, model_name: str, endpoint: str, model_id: str):
+        self.endpoint = endpoint
+        self._client = None
         self.model_name = deployment_name  # the azure deployment name
         self.actual_model_name = model_name  # the name of the actual model (e.g. gpt-4o)
-        self.model_id = f"azure{suffix}/" + deployment_name
+        self.model_id = model_id
         super().__init__(
             model_id=self.model_id,
             model_name=self.model_name,
@@ -206,17 +499,19 @@ class AzureAIFoundryModel(Chat):
         return f"Azure AI Foundry: {self.model_id} ({self.actual_model_name})"
 
     def get_client(self, key, *, async_=False):
+        if self._client is None:
+            self._client = get_openai_client(self.endpoint)
         return self._client
 
 
 class AsyncAzureAIFoundryModel(AsyncChat):
     needs_key = None
 
-    def __init__(self, deployment_name: str, model_name: str, client, suffix: str = ""):
-        self._client = client
+    def __init__(self, deployment_name: str, model_name: str, endpoint: str, model_id: str):
+        self.endpoint = endpoint
         self.model_name = deployment_name  # the azure deployment name
         self.actual_model_name = model_name  # the name of the actual model (e.g. gpt-4o)
-        self.model_id = f"azure{suffix}/" + deployment_name
+        self.model_id = model_id
         super().__init__(
             model_id=self.model_id,
             model_name=self.model_name,
@@ -231,7 +526,30 @@ class AsyncAzureAIFoundryModel(AsyncChat):
         return f"Azure AI Foundry: {self.model_id} ({self.actual_model_name})"
 
     def get_client(self, key, *, async_=False):
-        return self._client
+        # Not stored on the model, the client belongs to the running event loop
+        return get_async_openai_client(self.endpoint)
+
+    async def abatch(
+        self, prompts: List[str], concurrency: int = 10, **kwargs
+    ) -> List[llm.AsyncResponse]:
+        """
+        Run several prompts concurrently, with at most `concurrency` requests in flight.
+
+        Extra keyword arguments are passed to prompt(). Rate limits, server errors and
+        timeouts are retried by the OpenAI client (3 attempts by default) with exponential
+        backoff.
+        """
+        if concurrency < 1:
+            raise ValueError(f"concurrency must be at least 1, got {concurrency}")
+        semaphore = asyncio.Semaphore(concurrency)
+
+        async def run(prompt: str) -> llm.AsyncResponse:
+            async with semaphore:
+                response = self.prompt(prompt, **kwargs)
+                await response.text()
+                return response
+
+        return list(await asyncio.gather(*(run(prompt) for prompt in prompts)))
 
 
 class AzureAIFoundryEmbeddingModel(EmbeddingModel):
@@ -241,49 +559,135 @@ class AzureAIFoundryEmbeddingModel(EmbeddingModel):
         self,
         deployment_name: str,
         model_name: str,
-        client,
+        endpoint: str,
         model_id: str,
         dimensions: Optional[int] = None,
     ):
-        self._client = client
+        self.endpoint = endpoint
+        self._client = None
         self.model_name = deployment_name  # the azure deployment name
         self.actual_model_name = model_name  # the name of the actual model (e.g. gpt-4o)
         self.model_id = model_id
         self.dimensions = dimensions
 
     def embed_batch(self, items: Iterable[Union[str, bytes]]) -> Iterator[List[float]]:
-        kwargs = {
-            "input": items,
-            "model": self.model_name,
-        }
-        if self.dimensions:
-            kwargs["dimensions"] = self.dimensions
-        results = self._client.embeddings.create(**kwargs).data
-        return ([float(r) for r in result.embedding] for result in results)
+        items = list(items)
+        keys = [self.embedding_cache_key(item) for item in items]
+
+        # Take the hits out first, storing new embeddings may evict them
+        embeddings = {}
+        for key in keys:
+            if key in _cached_embeddings:
+                _cached_embeddings.move_to_end(key)
+                embeddings[key] = _cached_embeddings[key].tolist()
+
+        missing = {}
+        for key, item in zip(keys, items):
+            if key not in embeddings:
+                missing.setdefault(key, item)
+
+        if missing:
+            kwargs = {
+                "input": list(missing.values()),
+                "model": self.model_name,
+            }
+            if self.dimensions:
+                kwargs["dimensions"] = self.dimensions
+            if self._client is None:
+                self._client = get_openai_client(self.endpoint)
+            results = self._client.embeddings.create(**kwargs).data
+            # Match rows by index rather than position, they are cached under the input's key
+            missing_keys = list(missing)
+            for result in results:
+                key = missing_keys[result.index]
+                # Round through float32 like the cache does, so hits and misses match
+                vector = array("f", result.embedding)
+                embeddings[key] = vector.tolist()
+                if AZURE_EMBED_CACHE_SIZE:
+                    _cached_embeddings[key] = vector
+            while len(_cached_embeddings) > AZURE_EMBED_CACHE_SIZE:
+                _cached_embeddings.popitem(last=False)
+
+        return (embeddings[key] for key in keys)
+
+    def embedding_cache_key(self, item: Union[str, bytes]) -> bytes:
+        data = item.encode("utf-8") if isinstance(item, str) else item
+        digest = hashlib.blake2b(digest_size=16)
+        digest.update(f"{self.endpoint}|{self.model_name}|{self.dimensions}|".encode("utf-8"))
+        digest.update(data)
+        return digest.digest()
 
     def __str__(self):  # pyright: ignore[reportIncompatibleMethodOverride]
         return f"Azure AI Foundry: {self.model_id} ({self.actual_model_name})"
 
 
-class FoundryModelStatus(Enum):
-    Available = "available"
-    Cached = "cached"
-    Loaded = "loaded"
-
-    def __str__(self):
-        return self.value
+# Foundry Local model status, ordered so that execute() can check how far along a model
+# is with a single comparison
+STATUS_AVAILABLE, STATUS_CACHED, STATUS_LOADED = 0, 1, 2
+_STATUS_NAMES = ("available", "cached", "loaded")
+
+
+class FoundryModelStatus:
+    """Names for the STATUS_* constants, kept for backwards compatibility."""
+
+    Available = STATUS_AVAILABLE
+    Cached = STATUS_CACHED
+    Loaded = STATUS_LOADED
+
+
+class FoundryLocal:
+    """
+    Lazily started connection to the Foundry Local service, shared by all its models.
+    """
+
+    def __init__(self):
+        self._manager = None
+        self._statuses = None
+
+    @property
+    def manager(self) -> FoundryLocalManager:
+        if self._manager is None:
+            self._manager = FoundryLocalManager()
+        return self._manager
+
+    def list_chat_models(self) -> list[dict]:
+        return [
+            {"id": model.id, "alias": model.alias}
+            for model in self.manager.list_catalog_models()
+            if model.task == "chat-completion"
+        ]
+
+    def status(self, model_id: str) -> int:
+        if self._statuses is None:
+            manager = self.manager
+            # Cached and loaded models are looked up in the catalog, so fetch that first,
+            # then ask the service for both lists at once
+            manager.list_catalog_models()
+            with ThreadPoolExecutor(max_workers=2) as executor:
+                cached_ids, loaded_ids = executor.map(
+                    lambda list_models: {model.id for model in list_models()},
+                    (manager.list_cached_models, manager.list_loaded_models),
+                )
+            self._statuses = dict.fromkeys(cached_ids, STATUS_CACHED)
+            self._statuses.update(dict.fromkeys(loaded_ids, STATUS_LOADED))
+        return self._statuses.get(model_id, STATUS_AVAILABLE)
 
 
 class FoundryLocalModel(Chat):
-    needs_key = "foundry"  # set in constructor
+    needs_key = "foundry"  # provided by the Foundry Local service, see get_key()
 
     def __init__(
-        self, model_id: str, alias: str, manager: FoundryLocalManager, status: FoundryModelStatus
+        self,
+        model_id: str,
+        alias: str,
+        foundry: FoundryLocal,
+        status: Optional[int] = None,
     ):
         self.model_id = "foundry/" + model_id
         self.foundry_id = model_id
         self.model_name = alias
-        self.status = status
+        self.foundry = foundry
+        self._status = status
         super().__init__(
             model_id=self.model_id,
             model_name=self.foundry_id,
@@ -291,23 +695,43 @@ class FoundryLocalModel(Chat):
             reasoning=True,
             supports_schema=True,
             supports_tools=True,
-            api_base=manager.endpoint,
-            key=manager.api_key,
         )
-        self.manager = manager
+
+    @property
+    def manager(self) -> FoundryLocalManager:
+        return self.foundry.manager
+
+    @property
+    def status(self) -> int:
+        if self._status is None:
+            self._status = self.foundry.status(self.foundry_id)
+        return self._status
+
+    @status.setter
+    def status(self, value: int):
+        self._status = value
 
     def __str__(self):  # pyright: ignore[reportIncompatibleMethodOverride]
-        return f"Foundry Local: {self.model_id} ({self.status})"
+        return f"Foundry Local: {self.model_id} ({_STATUS_NAMES[self.status]})"
+
+    def get_key(self, explicit_key=None):
+        return self.manager.api_key
+
+    def get_client(self, key, *, async_=False):
+        # The endpoint is only known once the service has been started
+        self.api_base = self.manager.endpoint
+        return super().get_client(key, async_=async_)
 
     def execute(self, *args, **kwargs):  # pyright: ignore[reportIncompatibleMethodOverride]
-        if self.status == FoundryModelStatus.Available:
-            logging.warning("Model not cached, downloading from model registry")
-            self.manager.download_model(self.foundry_id)
-            self.status = FoundryModelStatus.Cached
-        if self.status == FoundryModelStatus.Cached:
-            logging.warning("Model not loaded, loading from cache")
+        status = self.status
+        if status < STATUS_LOADED:
+            if status < STATUS_CACHED:
+                log.warning("Model not cached, downloading from model registry")
+                self.manager.download_model(self.foundry_id)
+                self.status = STATUS_CACHED
+            log.warning("Model not loaded, loading from cache")
             self.manager.load_model(self.foundry_id)
-            self.status = FoundryModelStatus.Loaded
+            self.status = STATUS_LOADED
         return super().execute(*args, **kwargs)
 
 
@@ -0,0 +1,81 @@
+import asyncio
+import time
+from types import SimpleNamespace
+
+import pytest
+from openai.types.chat import ChatCompletion
+
+from llm_azure_ai_foundry import AsyncAzureAIFoundryModel
+
+
+class StubCompletions:
+    """Stands in for client.chat.completions, answering slowly with the prompt upper-cased."""
+
+    def __init__(self):
+        self.in_flight = 0
+        self.max_in_flight = 0
+
+    async def create(self, model, messages, stream, **kwargs):
+        self.in_flight += 1
+        self.max_in_flight = max(self.max_in_flight, self.in_flight)
+        prompt = messages[-1]["content"]
+        try:
+            # Later prompts finish first, so the order of the results isn't just luck
+            await asyncio.sleep(0.01 / len(prompt))
+        finally:
+            self.in_flight -= 1
+        return ChatCompletion.model_validate(
+            {
+                "id": "chatcmpl-test",
+                "object": "chat.completion",
+                "created": int(time.time()),
+                "model": model,
+                "choices": [
+                    {
+                        "index": 0,
+                        "finish_reason": "stop",
+                        "message": {"role": "assistant", "content": prompt.upper()},
+                    }
+                ],
+                "usage": {"prompt_tokens": 1, "completion_tokens": 1, "total_tokens": 2},
+            }
+        )
+
+
+@pytest.fixture
+def completions():
+    return StubCompletions()
+
+
+@pytest.fixture
+def model(completions, monkeypatch):
+    model = AsyncAzureAIFoundryModel(
+        deployment_name="gpt-4o",
+        model_name="gpt-4o",
+        endpoint="https://example.services.ai.azure.com/api/projects/test",
+        model_id="azure/gpt-4o",
+    )
+    client = SimpleNamespace(chat=SimpleNamespace(completions=completions))
+    monkeypatch.setattr(model, "get_client", lambda key, *, async_=False: client)
+    return model
+
+
+@pytest.mark.asyncio
+async def test_abatch_returns_responses_in_input_order(model):
+    prompts = ["a" * n for n in range(1, 9)]
+    responses = await model.abatch(prompts, concurrency=4, stream=False)
+    assert [await response.text() for response in responses] == [p.upper() for p in prompts]
+
+
+@pytest.mark.asyncio
+async def test_abatch_limits_requests_in_flight(model, completions):
+    await model.abatch(["a" * n for n in range(1, 11)], concurrency=3, stream=False)
+    assert completions.max_in_flight == 3
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("concurrency", [0, -1])
+async def test_abatch_rejects_concurrency_below_one(model, completions, concurrency):
+    with pytest.raises(ValueError):
+        await model.abatch(["a"], concurrency=concurrency)
+    assert completions.max_in_flight == 0
@@ -0,0 +1,68 @@
+import asyncio
+import gc
+import threading
+import warnings
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+import llm_azure_ai_foundry
+from llm_azure_ai_foundry import get_async_openai_client
+
+ENDPOINT = "https://example.services.ai.azure.com/api/projects/test"
+
+
+class OkHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def do_GET(self):
+        self.send_response(200)
+        self.send_header("Content-Length", "0")
+        self.end_headers()
+
+    def log_message(self, format, *args):
+        pass
+
+
+@pytest.fixture
+def server_url():
+    server = ThreadingHTTPServer(("127.0.0.1", 0), OkHandler)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield f"http://127.0.0.1:{server.server_address[1]}/"
+    server.shutdown()
+    server.server_close()
+
+
+def test_clients_are_reused_within_a_loop():
+    async def main():
+        return get_async_openai_client(ENDPOINT), get_async_openai_client(ENDPOINT)
+
+    first, second = asyncio.run(main())
+    assert first is second
+
+
+def test_clients_are_closed_with_their_loop(server_url):
+    http_clients = []
+
+    async def main():
+        client = get_async_openai_client(ENDPOINT)
+        clients = llm_azure_ai_foundry._async_clients[asyncio.get_running_loop()]
+        http_clients.append(clients.http_client)
+        # Leave a pooled connection open, which refers back to the loop
+        response = await clients.http_client.get(server_url)
+        assert response.status_code == 200
+        return client
+
+    with warnings.catch_warnings(record=True) as caught:
+        warnings.simplefilter("always", ResourceWarning)
+        first = asyncio.run(main())
+        second = asyncio.run(main())
+        gc.collect()
+
+    assert not [w for w in caught if issubclass(w.category, ResourceWarning)]
+
+    assert first is not second
+    assert len(http_clients) == 2
+    assert all(http_client.is_closed for http_client in http_clients)
+    assert not llm_azure_ai_foundry._async_clients
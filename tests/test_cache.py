@@ -0,0 +1,72 @@
+import os
+import time
+
+import pytest
+
+import llm_azure_ai_foundry
+from llm_azure_ai_foundry import cache_path, load_cache, save_cache, write_atomic
+
+ITEMS = [{"name": "gpt-4o", "modelName": "gpt-4o", "capabilities": {"chat_completion": "true"}}]
+
+
+@pytest.fixture(autouse=True)
+def cache_dir(tmp_path, monkeypatch):
+    monkeypatch.setattr(llm_azure_ai_foundry, "CACHE_DIR", tmp_path)
+    return tmp_path
+
+
+def test_round_trip():
+    save_cache("deployments", "https://a", ITEMS)
+    assert load_cache("deployments", "https://a") == ITEMS
+
+
+def test_missing():
+    assert load_cache("deployments", "https://a") is None
+
+
+def test_expired(monkeypatch):
+    save_cache("deployments", "https://a", ITEMS)
+    monkeypatch.setattr(llm_azure_ai_foundry, "AZURE_DEPLOYMENTS_TTL", 60)
+    path = cache_path("deployments", "https://a")
+    old = time.time() - 120
+    os.utime(path, (old, old))
+    assert load_cache("deployments", "https://a") is None
+
+
+def test_key_mismatch():
+    save_cache("deployments", "https://a", ITEMS)
+    os.replace(cache_path("deployments", "https://a"), cache_path("deployments", "https://b"))
+    assert load_cache("deployments", "https://b") is None
+
+
+@pytest.mark.parametrize(
+    "data",
+    [
+        b"not json",
+        b"[]",
+        b'"https://a"',
+        b'{"key": "https://a"}',
+        b'{"key": "https://a", "items": {}}',
+        b'{"items": []}',
+    ],
+)
+def test_bad_contents_are_a_miss(cache_dir, data):
+    cache_dir.mkdir(parents=True, exist_ok=True)
+    cache_path("deployments", "https://a").write_bytes(data)
+    assert load_cache("deployments", "https://a") is None
+
+
+def test_write_atomic_replaces_without_leaving_temporary_files(cache_dir):
+    path = cache_dir / "nested" / "file.json"
+    write_atomic(path, b"first")
+    write_atomic(path, b"second")
+    assert path.read_bytes() == b"second"
+    assert [p.name for p in path.parent.iterdir()] == ["file.json"]
+
+
+def test_save_cache_ignores_unwritable_directory(cache_dir, monkeypatch):
+    blocker = cache_dir / "blocker"
+    blocker.write_text("")
+    monkeypatch.setattr(llm_azure_ai_foundry, "CACHE_DIR", blocker / "llm-azure")
+    save_cache("deployments", "https://a", ITEMS)
+    assert load_cache("deployments", "https://a") is None
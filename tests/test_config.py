@@ -0,0 +1,83 @@
+import os
+
+import llm
+import pytest
+
+import llm_azure_ai_foundry
+from llm_azure_ai_foundry import get_deployments_from_config
+
+
+@pytest.fixture
+def keys(monkeypatch):
+    for name in list(os.environ):
+        if name.startswith("AZURE_ENDPOINT"):
+            monkeypatch.delenv(name)
+    keys = {}
+    monkeypatch.setattr(llm, "load_keys", lambda: keys)
+    # One chat deployment per endpoint, named after it, without querying Azure
+    monkeypatch.setattr(
+        llm_azure_ai_foundry,
+        "load_cache",
+        lambda name, endpoint: [
+            {"name": endpoint, "modelName": "gpt-4o", "capabilities": {"chat_completion": "true"}}
+        ],
+    )
+    return keys
+
+
+def configured_endpoints():
+    return [
+        (suffix, endpoint) for suffix, endpoint, _ in get_deployments_from_config("chat_completion")
+    ]
+
+
+def test_no_base_endpoint(keys, monkeypatch):
+    keys["azure.endpoint.0"] = "https://zero"
+    monkeypatch.setenv("AZURE_ENDPOINT_1", "https://one")
+    assert configured_endpoints() == []
+
+
+def test_base_endpoint_key_beats_environment(keys, monkeypatch):
+    monkeypatch.setenv("AZURE_ENDPOINT", "https://env")
+    assert configured_endpoints() == [("", "https://env")]
+    keys["azure.endpoint"] = "https://key"
+    assert configured_endpoints() == [("", "https://key")]
+
+
+def test_numbered_environment_beats_key(keys, monkeypatch):
+    keys["azure.endpoint"] = "https://base"
+    keys["azure.endpoint.0"] = "https://key-0"
+    keys["azure.endpoint.1"] = "https://key-1"
+    monkeypatch.setenv("AZURE_ENDPOINT_1", "https://env-1")
+    assert configured_endpoints() == [
+        ("", "https://base"),
+        (".0", "https://key-0"),
+        (".1", "https://env-1"),
+    ]
+
+
+def test_numbered_endpoints_in_numeric_order(keys, monkeypatch):
+    keys["azure.endpoint"] = "https://base"
+    keys["azure.endpoint.10"] = "https://ten"
+    monkeypatch.setenv("AZURE_ENDPOINT_2", "https://two")
+    keys["azure.endpoint.9"] = "https://nine"
+    assert configured_endpoints() == [
+        ("", "https://base"),
+        (".2", "https://two"),
+        (".9", "https://nine"),
+        (".10", "https://ten"),
+    ]
+
+
+@pytest.mark.parametrize("index", ["", "x", "1x", "-1", "²", "٣", "01", "00", " 1"])
+def test_invalid_indices_are_ignored(keys, monkeypatch, index):
+    keys["azure.endpoint"] = "https://base"
+    keys[f"azure.endpoint.{index}"] = "https://key"
+    monkeypatch.setenv(f"AZURE_ENDPOINT_{index}", "https://env")
+    assert configured_endpoints() == [("", "https://base")]
+
+
+def test_blank_endpoints_are_ignored(keys, monkeypatch):
+    keys["azure.endpoint"] = "https://base"
+    keys["azure.endpoint.0"] = " "
+    assert configured_endpoints() == [("", "https://base")]
@@ -0,0 +1,99 @@
+from collections import OrderedDict
+from types import SimpleNamespace
+
+import pytest
+
+import llm_azure_ai_foundry
+from llm_azure_ai_foundry import AzureAIFoundryEmbeddingModel
+
+
+class StubEmbeddings:
+    """Stands in for client.embeddings, returning rows in reverse order like a shuffled API."""
+
+    def __init__(self):
+        self.calls = []
+
+    def create(self, input, model, **kwargs):
+        self.calls.append(list(input))
+        rows = [
+            SimpleNamespace(index=i, embedding=[float(len(text)), float(i)])
+            for i, text in enumerate(input)
+        ]
+        return SimpleNamespace(data=list(reversed(rows)))
+
+
+@pytest.fixture
+def embeddings():
+    return StubEmbeddings()
+
+
+@pytest.fixture
+def model(embeddings, monkeypatch):
+    monkeypatch.setattr(llm_azure_ai_foundry, "_cached_embeddings", OrderedDict())
+    model = AzureAIFoundryEmbeddingModel(
+        deployment_name="embed",
+        model_name="text-embedding-3-small",
+        endpoint="https://example.services.ai.azure.com/api/projects/test",
+        model_id="azure/embed",
+    )
+    monkeypatch.setattr(model, "_client", SimpleNamespace(embeddings=embeddings))
+    return model
+
+
+def test_embed_batch_keeps_input_order(model, embeddings):
+    assert list(model.embed_batch(["a", "bbb", "cc"])) == [[1.0, 0.0], [3.0, 1.0], [2.0, 2.0]]
+    assert embeddings.calls == [["a", "bbb", "cc"]]
+
+
+def test_embed_batch_sends_duplicates_once(model, embeddings):
+    assert list(model.embed_batch(["a", "bb", "a"])) == [[1.0, 0.0], [2.0, 1.0], [1.0, 0.0]]
+    assert embeddings.calls == [["a", "bb"]]
+
+
+def test_embed_batch_only_requests_misses(model, embeddings):
+    list(model.embed_batch(["a", "bb"]))
+    assert list(model.embed_batch(["ccc", "bb", "a", "dddd"])) == [
+        [3.0, 0.0],
+        [2.0, 1.0],
+        [1.0, 0.0],
+        [4.0, 1.0],
+    ]
+    assert embeddings.calls == [["a", "bb"], ["ccc", "dddd"]]
+    # Everything is cached now
+    list(model.embed_batch(["dddd", "a"]))
+    assert len(embeddings.calls) == 2
+
+
+def test_embed_batch_evicts_least_recently_used(model, embeddings, monkeypatch):
+    monkeypatch.setattr(llm_azure_ai_foundry, "AZURE_EMBED_CACHE_SIZE", 2)
+    list(model.embed_batch(["a", "bb"]))
+    list(model.embed_batch(["a"]))  # "bb" is now the least recently used
+    list(model.embed_batch(["ccc"]))
+    assert len(llm_azure_ai_foundry._cached_embeddings) == 2
+
+    list(model.embed_batch(["a", "ccc"]))
+    assert len(embeddings.calls) == 2
+    assert list(model.embed_batch(["bb"])) == [[2.0, 0.0]]
+    assert embeddings.calls[-1] == ["bb"]
+
+
+def test_embed_batch_same_precision_for_hits_and_misses(model, embeddings, monkeypatch):
+    monkeypatch.setattr(
+        embeddings,
+        "create",
+        lambda input, **kwargs: SimpleNamespace(
+            data=[SimpleNamespace(index=i, embedding=[0.1, 0.2]) for i in range(len(input))]
+        ),
+    )
+    miss = list(model.embed_batch(["a"]))
+    hit = list(model.embed_batch(["a"]))
+    assert miss == hit
+    assert miss[0] == pytest.approx([0.1, 0.2])
+
+
+def test_embed_batch_cache_disabled(model, embeddings, monkeypatch):
+    monkeypatch.setattr(llm_azure_ai_foundry, "AZURE_EMBED_CACHE_SIZE", 0)
+    list(model.embed_batch(["a"]))
+    assert list(model.embed_batch(["a"])) == [[1.0, 0.0]]
+    assert len(embeddings.calls) == 2
+    assert not llm_azure_ai_foundry._cached_embeddings